@@ -1,66 +1,113 @@
+import re
+
 import pandas as pd
 
 FILE_PATH = "PL-financials.xlsx"  # put the Excel file in the same folder as this script
 
-xls = pd.ExcelFile(FILE_PATH)
+# Short season format like "13-14", compiled once instead of per call
+_SHORT_SEASON = re.compile(r"^(\d{2})-(\d{2})$")
 
-dfs = []
 
 def normalise_season_value(s: str) -> str:
     s = str(s).strip().replace("–", "-")  # convert en-dash to hyphen
     # If season is like "13-14", convert to "2013-14"
-    m = pd.Series([s]).str.extract(r"^(\d{2})-(\d{2})$").iloc[0].tolist()
-    if m[0] is not None and m[1] is not None:
-        return f"20{m[0]}-{m[1]}"
-    # If season is like "2013-14", keep as-is
-    if pd.Series([s]).str.match(r"^\d{4}-\d{2}$").iloc[0]:
-        return s
+    m = _SHORT_SEASON.match(s)
+    if m:
+        return f"20{m.group(1)}-{m.group(2)}"
+    # If season is like "2013-14" (or anything else), keep as-is
     return s
 
-for sheet in xls.sheet_names:
-    df = pd.read_excel(xls, sheet_name=sheet)
-
-    # Normalise column names
-    df.columns = [str(c).strip() for c in df.columns]
-
-    # Force season from the sheet name (prevents Excel auto-fill issues like 22-24, 22-25, etc.)
-    df["season"] = normalise_season_value(sheet)
-
-    # Standardise club column name
-    if "club" not in df.columns:
-        club_like = [c for c in df.columns if "club" in c.lower()]
-        if club_like:
-            df = df.rename(columns={club_like[0]: "club"})
-
-    # Standardise promoted column name
-    prom_like = [c for c in df.columns if "promot" in c.lower()]
-    if prom_like and prom_like[0] != "promoted":
-        df = df.rename(columns={prom_like[0]: "promoted"})
-
-    # Standardise transfer spend column name
-    spend_like = [
-        c for c in df.columns
-        if ("transfer" in c.lower() and ("spend" in c.lower() or "expend" in c.lower()))
-    ]
-    if spend_like and spend_like[0] != "gross_transfer_spend_gbp_m":
-        df = df.rename(columns={spend_like[0]: "gross_transfer_spend_gbp_m"})
-
-    dfs.append(df)
-
-stacked = pd.concat(dfs, ignore_index=True)
-
-# Quick integrity checks
-print("Rows:", len(stacked))
-print("Seasons:", stacked["season"].nunique())
-print("Unique clubs:", stacked["club"].nunique())
-
-print("\nRows per season:")
-print(stacked.groupby("season")["club"].count().sort_index())
-
-# Optional: check duplicates within a season
-dupes = stacked[stacked.duplicated(subset=["season", "club"], keep=False)].sort_values(["season", "club"])
-print("\nDuplicate season,club rows:", len(dupes))
 
-# Save analysis-ready file
-stacked.to_csv("pl_financials_stacked.csv", index=False)
-print("\nSaved: pl_financials_stacked.csv")
\ No newline at end of file
+def prepare(file_path: str = FILE_PATH) -> pd.DataFrame:
+    """
+    Reads the per-season sheets from the financials workbook, normalises
+    column names, and returns them stacked into one dataframe.
+    """
+    # Read every sheet in one go. Calamine (Rust-based, pandas >= 2.2) parses
+    # XLSX several times faster than openpyxl with much lower memory use;
+    # fall back to openpyxl read-only mode if calamine is unavailable or
+    # chokes on the workbook.
+    try:
+        sheets = pd.read_excel(file_path, sheet_name=None, engine="calamine")
+    except Exception:
+        sheets = pd.read_excel(
+            file_path,
+            sheet_name=None,
+            engine="openpyxl",
+            engine_kwargs={"read_only": True, "data_only": True, "keep_links": False},
+        )
+
+    dfs = []
+
+    for sheet, df in sheets.items():
+        # Normalise column names
+        df.columns = [str(c).strip() for c in df.columns]
+
+        # Force season from the sheet name (prevents Excel auto-fill issues like 22-24, 22-25, etc.)
+        df["season"] = normalise_season_value(sheet)
+
+        # Standardise club / promoted / transfer spend column names in a
+        # single pass over the lower-cased names instead of three scans
+        rename = {}
+        found_club = "club" in df.columns
+        found_promoted = False
+        found_spend = False
+        for c in df.columns:
+            cl = c.lower()
+            if not found_club and "club" in cl:
+                rename[c] = "club"
+                found_club = True
+            elif not found_promoted and "promot" in cl:
+                if c != "promoted":
+                    rename[c] = "promoted"
+                found_promoted = True
+            elif not found_spend and "transfer" in cl and ("spend" in cl or "expend" in cl):
+                if c != "gross_transfer_spend_gbp_m":
+                    rename[c] = "gross_transfer_spend_gbp_m"
+                found_spend = True
+        if rename:
+            df = df.rename(columns=rename)
+
+        dfs.append(df)
+
+    # Align every sheet to one canonical column order (first-seen across
+    # sheets) before concatenating. With identical schemas concat does a
+    # single stack instead of reindex+fill per frame, and copy=False skips
+    # the defensive copy of every column.
+    canon_cols = []
+    for df in dfs:
+        for c in df.columns:
+            if c not in canon_cols:
+                canon_cols.append(c)
+    dfs = [df.reindex(columns=canon_cols) for df in dfs]
+
+    stacked = pd.concat(dfs, ignore_index=True, sort=False, copy=False)
+
+    # Quick integrity checks
+    print("Rows:", len(stacked))
+    print("Seasons:", stacked["season"].nunique())
+    print("Unique clubs:", stacked["club"].nunique())
+
+    print("\nRows per season:")
+    print(stacked.groupby("season")["club"].count().sort_index())
+
+    # Optional: check duplicates within a season (one hash-agg pass rather
+    # than a full boolean mask + sub-frame + sort)
+    sizes = stacked.groupby(["season", "club"], sort=False, observed=True).size()
+    print("\nDuplicate season,club rows:", int(sizes[sizes > 1].sum()))
+
+    # Categoricals store int codes instead of repeated strings, which makes
+    # downstream groupby and the season dummies in 03 much cheaper
+    stacked["season"] = stacked["season"].astype("category")
+    stacked["club"] = stacked["club"].astype("category")
+
+    return stacked
+
+
+if __name__ == "__main__":
+    stacked = prepare()
+
+    # Save analysis-ready file. Parquet keeps dtypes across stages and is
+    # much faster and smaller than CSV round-trips.
+    stacked.to_parquet("pl_financials_stacked.parquet", engine="pyarrow", compression="zstd")
+    print("\nSaved: pl_financials_stacked.parquet")
@@ -1,76 +1,104 @@
+import numpy as np
 import pandas as pd
 
-# Load stacked dataset
-df = pd.read_csv("pl_financials_stacked.csv")
-
-# ----
-# 1) Normalise column names (handles your current "League position" vs league_position issue)
-# ----
-rename_map = {
-    "Season": "season_excel",          # keep if you want to compare, but we'll use `season` going forward
-    "League position": "league_position",
-    "Points total": "points_total",
-}
-
-df = df.rename(columns=rename_map)
-
-# If you have both `season` and `season_excel`, prefer `season` (generated from sheet name)
-if "season_excel" in df.columns:
-    # Drop season_excel unless you want to audit differences
-    df = df.drop(columns=["season_excel"])
-
-# ----
-# 2) Quick inspection
-# ----
-print("Columns:")
-print(df.columns.tolist())
-
-print("\nHead (season, club):")
-print(df[["season", "club"]].head())
-
-# ----
-# 3) Missing value check (key columns)
-# ----
-key_cols = [
-    "total_wage_bill_gbp_m",
-    "league_position",
-    "points_total",
-    "gross_transfer_spend_gbp_m",
-    "promoted",
-]
-
-print("\nMissing values in key columns:")
-print(df[key_cols].isna().sum())
-
-# ----
-# 4) Ensure numeric types (helps correlation/regression)
-# ----
-numeric_cols = ["total_wage_bill_gbp_m", "league_position", "points_total", "gross_transfer_spend_gbp_m", "promoted"]
-for c in numeric_cols:
-    df[c] = pd.to_numeric(df[c], errors="coerce")
-
-# Fix promoted column: treat missing as 0 (not promoted)
-df["promoted"] = df["promoted"].fillna(0).astype(int)
-
-# ----
-# 5) Correlations
-# ----
-print("\nCorrelation with points_total:")
-print(
-    df[["points_total", "total_wage_bill_gbp_m", "gross_transfer_spend_gbp_m"]]
-    .corr()["points_total"]
-    .sort_values(ascending=False)
-)
-
-print("\nCorrelation with league_position (lower is better):")
-print(
-    df[["league_position", "total_wage_bill_gbp_m", "gross_transfer_spend_gbp_m"]]
-    .corr()["league_position"]
-    .sort_values()
-)
-
-# ----
-# 6) Optional: save a cleaned analysis-ready CSV
-# ----
-df.to_csv("pl_financials_analysis_ready.csv", index=False)
-print("\nSaved: pl_financials_analysis_ready.csv")
\ No newline at end of file
+
+def corr_with(df: pd.DataFrame, target: str, cols: list) -> pd.Series:
+    """
+    Pearson correlations of target against each column in cols, computed
+    as direct numpy dot products instead of building a full k x k
+    .corr() matrix. Rows with a missing value in any column are dropped.
+    """
+    a = df[cols].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    mask = ~np.isnan(y) & ~np.isnan(a).any(axis=1)
+    a = a[mask]
+    y = y[mask]
+    a = a - a.mean(axis=0)
+    y = y - y.mean()
+    r = (a.T @ y) / (np.linalg.norm(a, axis=0) * np.linalg.norm(y))
+    return pd.Series(r, index=cols)
+
+
+def clean(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Takes the stacked dataset from 01, fixes column names and dtypes, and
+    returns the analysis-ready dataframe (also prints the correlations).
+    """
+    # ----
+    # 1) Normalise column names (handles your current "League position" vs league_position issue)
+    # ----
+    rename_map = {
+        "Season": "season_excel",          # keep if you want to compare, but we'll use `season` going forward
+        "League position": "league_position",
+        "Points total": "points_total",
+    }
+
+    df = df.rename(columns=rename_map)
+
+    # If you have both `season` and `season_excel`, prefer `season` (generated from sheet name)
+    if "season_excel" in df.columns:
+        # Drop season_excel unless you want to audit differences
+        df = df.drop(columns=["season_excel"])
+
+    # ----
+    # 2) Quick inspection
+    # ----
+    print("Columns:")
+    print(df.columns.tolist())
+
+    print("\nHead (season, club):")
+    print(df[["season", "club"]].head())
+
+    # ----
+    # 3) Missing value check (key columns)
+    # ----
+    key_cols = [
+        "total_wage_bill_gbp_m",
+        "league_position",
+        "points_total",
+        "gross_transfer_spend_gbp_m",
+        "promoted",
+    ]
+
+    print("\nMissing values in key columns:")
+    print(df[key_cols].isna().sum())
+
+    # ----
+    # 4) Ensure numeric types (helps correlation/regression)
+    # ----
+    numeric_cols = ["total_wage_bill_gbp_m", "league_position", "points_total", "gross_transfer_spend_gbp_m", "promoted"]
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce")
+
+    # Fix promoted column: treat missing as 0 (not promoted)
+    df["promoted"] = df["promoted"].fillna(0).astype(int)
+
+    # Downcast: wages, spend, points, and positions all fit comfortably
+    # in float32 (and promoted in int8), halving the memory moved by
+    # corr(), groupby, and the regression design matrix downstream
+    for c in ["total_wage_bill_gbp_m", "league_position", "points_total", "gross_transfer_spend_gbp_m"]:
+        df[c] = pd.to_numeric(df[c], downcast="float")
+    df["promoted"] = df["promoted"].astype("int8")
+
+    # ----
+    # 5) Correlations
+    # ----
+    spend_cols = ["total_wage_bill_gbp_m", "gross_transfer_spend_gbp_m"]
+
+    print("\nCorrelation with points_total:")
+    print(corr_with(df, "points_total", spend_cols).sort_values(ascending=False))
+
+    print("\nCorrelation with league_position (lower is better):")
+    print(corr_with(df, "league_position", spend_cols).sort_values())
+
+    return df
+
+
+if __name__ == "__main__":
+    # Load stacked dataset
+    df = clean(pd.read_parquet("pl_financials_stacked.parquet"))
+
+    # Save the cleaned analysis-ready dataset
+    # (Parquet preserves the numeric dtypes fixed above, so 03 does not
+    # need to re-coerce anything)
+    df.to_parquet("pl_financials_analysis_ready.parquet", engine="pyarrow", compression="zstd")
+    print("\nSaved: pl_financials_analysis_ready.parquet")
@@ -1,80 +1,84 @@
 import pandas as pd
-import statsmodels.formula.api as smf
+import patsy
+import statsmodels.api as sm
 
-# Load the cleaned dataset you saved
-df = pd.read_csv("pl_financials_analysis_ready.csv")
 
-# Make sure key columns are numeric and usable
-df["points_total"] = pd.to_numeric(df["points_total"], errors="coerce")
-df["league_position"] = pd.to_numeric(df["league_position"], errors="coerce")
-df["total_wage_bill_gbp_m"] = pd.to_numeric(df["total_wage_bill_gbp_m"], errors="coerce")
-df["gross_transfer_spend_gbp_m"] = pd.to_numeric(df["gross_transfer_spend_gbp_m"], errors="coerce")
+def regress(df: pd.DataFrame) -> None:
+    """
+    Fits the four OLS models on the analysis-ready dataframe, prints their
+    summaries, and writes them to regression_outputs.txt.
+    """
+    # Fix common missing patterns
+    df["gross_transfer_spend_gbp_m"] = df["gross_transfer_spend_gbp_m"].fillna(0)
 
-# Fix common missing patterns
-df["gross_transfer_spend_gbp_m"] = df["gross_transfer_spend_gbp_m"].fillna(0)
-df["promoted"] = pd.to_numeric(df["promoted"], errors="coerce").fillna(0).astype(int)
+    # Drop any rows missing the core dependent variable
+    df = df.dropna(subset=["points_total", "total_wage_bill_gbp_m"])
 
-# Drop any rows missing the core dependent variable
-df = df.dropna(subset=["points_total", "total_wage_bill_gbp_m"])
+    print("Rows used:", len(df))
+    print(df[["season", "club"]].head())
 
-print("Rows used:", len(df))
-print(df[["season", "club"]].head())
+    # Build the full design matrix once; models 1-3 reuse column subsets
+    # of it instead of re-parsing a Patsy formula and rebuilding the
+    # season dummies for every fit
+    # season is categorical (set in 01), so Patsy expands it to dummies
+    # without the explicit C() wrapper
+    rhs = "total_wage_bill_gbp_m + gross_transfer_spend_gbp_m + promoted + season"
+    y_points, X_full = patsy.dmatrices(
+        f"points_total ~ {rhs}", data=df, return_type="dataframe"
+    )
 
-# -------------------------
-# Model 1: Points ~ Wages
-# -------------------------
-m1 = smf.ols(
-    "points_total ~ total_wage_bill_gbp_m",
-    data=df
-).fit(cov_type="HC3")
+    # Stream each summary to regression_outputs.txt as soon as its model
+    # is fitted: only one summary string lives in memory at a time, and a
+    # failure in a later model still leaves the earlier tables on disk
+    with open("regression_outputs.txt", "w") as f:
 
-print("\nMODEL 1: points_total ~ total_wage_bill_gbp_m (robust SE)")
-print(m1.summary())
+        def report(number: int, heading: str, model) -> None:
+            text = model.summary().as_text()
+            print(f"\n{heading}")
+            print(text)
+            f.write(f"MODEL {number}\n" if number == 1 else f"\n\nMODEL {number}\n")
+            f.write(text)
+            f.flush()
 
-# -----------------------------------------
-# Model 2: Points ~ Wages + Transfers
-# -----------------------------------------
-m2 = smf.ols(
-    "points_total ~ total_wage_bill_gbp_m + gross_transfer_spend_gbp_m",
-    data=df
-).fit(cov_type="HC3")
+        # -------------------------
+        # Model 1: Points ~ Wages
+        # -------------------------
+        m1 = sm.OLS(y_points, X_full[["Intercept", "total_wage_bill_gbp_m"]]).fit(cov_type="HC3")
+        report(1, "MODEL 1: points_total ~ total_wage_bill_gbp_m (robust SE)", m1)
 
-print("\nMODEL 2: points_total ~ wages + transfers (robust SE)")
-print(m2.summary())
+        # -----------------------------------------
+        # Model 2: Points ~ Wages + Transfers
+        # -----------------------------------------
+        m2 = sm.OLS(
+            y_points,
+            X_full[["Intercept", "total_wage_bill_gbp_m", "gross_transfer_spend_gbp_m"]],
+        ).fit(cov_type="HC3")
+        report(2, "MODEL 2: points_total ~ wages + transfers (robust SE)", m2)
 
-# ---------------------------------------------------
-# Optional Model 3: Add promoted control + season FE
-# (Season fixed effects control for league-wide shifts)
-# ---------------------------------------------------
-m3 = smf.ols(
-    "points_total ~ total_wage_bill_gbp_m + gross_transfer_spend_gbp_m + promoted + C(season)",
-    data=df
-).fit(cov_type="HC3")
+        # ---------------------------------------------------
+        # Optional Model 3: Add promoted control + season FE
+        # (Season fixed effects control for league-wide shifts)
+        # ---------------------------------------------------
+        m3 = sm.OLS(y_points, X_full).fit(cov_type="HC3")
+        report(3, "MODEL 3: wages + transfers + promoted + season fixed effects (robust SE)", m3)
 
-print("\nMODEL 3: wages + transfers + promoted + season fixed effects (robust SE)")
-print(m3.summary())
+        # -----------------------------------------
+        # Optional: League position as robustness
+        # (lower is better, so coefficients will flip sign;
+        # needs its own design matrix so rows missing league_position
+        # are dropped consistently)
+        # -----------------------------------------
+        y_pos, X_pos = patsy.dmatrices(
+            f"league_position ~ {rhs}", data=df, return_type="dataframe"
+        )
+        m4 = sm.OLS(y_pos, X_pos).fit(cov_type="HC3")
+        report(4, "MODEL 4: league_position ~ wages + transfers + promoted + season FE (robust SE)", m4)
 
-# -----------------------------------------
-# Optional: League position as robustness
-# (lower is better, so coefficients will flip sign)
-# -----------------------------------------
-m4 = smf.ols(
-    "league_position ~ total_wage_bill_gbp_m + gross_transfer_spend_gbp_m + promoted + C(season)",
-    data=df
-).fit(cov_type="HC3")
+    print("\nSaved: regression_outputs.txt")
 
-print("\nMODEL 4: league_position ~ wages + transfers + promoted + season FE (robust SE)")
-print(m4.summary())
 
-# Save regression tables to text for your appendix
-with open("regression_outputs.txt", "w") as f:
-    f.write("MODEL 1\n")
-    f.write(m1.summary().as_text())
-    f.write("\n\nMODEL 2\n")
-    f.write(m2.summary().as_text())
-    f.write("\n\nMODEL 3\n")
-    f.write(m3.summary().as_text())
-    f.write("\n\nMODEL 4\n")
-    f.write(m4.summary().as_text())
-
-print("\nSaved: regression_outputs.txt")
\ No newline at end of file
+if __name__ == "__main__":
+    # Load the cleaned dataset you saved
+    # (02 already coerced the key columns to numeric and Parquet preserves
+    # those dtypes, so no re-coercion is needed here)
+    regress(pd.read_parquet("pl_financials_analysis_ready.parquet"))
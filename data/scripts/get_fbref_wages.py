@@ -1,12 +1,54 @@
 import argparse
+import gzip
+import hashlib
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Tuple
 
+import lxml.html
 import pandas as pd
 import requests
-
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session: reuses TCP+TLS connections across seasons, asks for
+# compressed responses, and retries transient server errors with backoff
+SESSION = requests.Session()
+SESSION.headers.update(
+    {
+        "User-Agent": "Mozilla/5.0 (compatible; final-year-project; +https://github.com/)",
+        "Accept-Encoding": "gzip, deflate",
+    }
+)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504]),
+    ),
+)
+
+# Global rate limiter shared by all download threads, so parallel fetches
+# stay polite to FBref no matter how many workers are running
+_rate_lock = threading.Lock()
+_last_request_time = 0.0
+
+
+def rate_limit(min_interval_seconds: float) -> None:
+    """
+    Blocks until at least min_interval_seconds have passed since the last
+    request made by any thread.
+    """
+    global _last_request_time
+    with _rate_lock:
+        wait = _last_request_time + min_interval_seconds - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request_time = time.monotonic()
 
 def season_slug(season: str) -> str:
     """
@@ -18,32 +60,21 @@ def season_slug(season: str) -> str:
     return f"{m.group(1)}-{m.group(2)}"
 
 
-def parse_money_to_gbp(value) -> Optional[float]:
+def parse_money_to_gbp(values: pd.Series) -> pd.Series:
     """
-    Converts strings like '£113,900,000' or '£113.9m' into a float number of GBP.
-    Returns None if value cannot be parsed.
+    Converts a Series of strings like '£113,900,000' or '£113.9m' into float
+    numbers of GBP. Unparseable values become NaN.
     """
-    if pd.isna(value):
-        return None
-    s = str(value).strip()
-
-    if s == "" or s.lower() in {"nan", "none"}:
-        return None
-
-    # Remove currency symbol and spaces
-    s = s.replace("£", "").replace(",", "").strip()
-
-    # Handle formats like 113.9m
-    m = re.match(r"^(\d+(\.\d+)?)\s*[mM]$", s)
-    if m:
-        return float(m.group(1)) * 1_000_000
-
-    # Handle plain integers
-    m = re.match(r"^\d+(\.\d+)?$", s)
-    if m:
-        return float(s)
-
-    return None
+    s = (
+        values.astype("string")
+        .str.replace("£", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.strip()
+    )
+    # Single vectorised regex sweep: a number with an optional millions suffix
+    ext = s.str.extract(r"^(?P<num>\d+(?:\.\d+)?)\s*(?P<m>[mM])?$")
+    multiplier = ext["m"].notna().map({True: 1_000_000.0, False: 1.0})
+    return pd.to_numeric(ext["num"], errors="coerce") * multiplier
 
 
 def find_wages_table(df_list: list[pd.DataFrame]) -> Tuple[pd.DataFrame, str]:
@@ -83,23 +114,56 @@ def find_wages_table(df_list: list[pd.DataFrame]) -> Tuple[pd.DataFrame, str]:
     return best_df, best_col
 
 
-def fetch_fbref_wages_for_season(season: str, sleep_seconds: float = 1.0) -> pd.DataFrame:
+def season_is_finished(season: str) -> bool:
+    """
+    True if the season has already ended, meaning its FBref page is
+    effectively immutable and safe to serve from the cache.
+    """
+    end_year = int(season.split("-")[1])
+    return end_year < time.localtime().tm_year
+
+
+def fetch_fbref_wages_for_season(
+    season: str, sleep_seconds: float = 1.0, cache_dir: Optional[str] = None
+) -> pd.DataFrame:
     """
     Fetches FBref Premier League wages table for a given season and returns a clean dataframe:
     columns: club, season, total_wage_bill_gbp
+
+    If cache_dir is given, raw page HTML is cached there (gzipped, keyed by
+    URL) so re-runs for finished seasons need no network at all.
     """
     slug = season_slug(season)
     url = f"https://fbref.com/en/comps/9/{slug}/wages/Premier-League-Wages"
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; final-year-project; +https://github.com/)"
-    }
-
-    r = requests.get(url, headers=headers, timeout=30)
-    r.raise_for_status()
-
-    # FBref tables are standard HTML tables
-    tables = pd.read_html(r.text)
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest() + ".html.gz")
+
+    content = None
+    if cache_path and os.path.exists(cache_path) and season_is_finished(season):
+        with open(cache_path, "rb") as fh:
+            content = gzip.decompress(fh.read())
+
+    if content is None:
+        rate_limit(sleep_seconds)
+        r = SESSION.get(url, timeout=30)
+        r.raise_for_status()
+        content = r.content
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "wb") as fh:
+                fh.write(gzip.compress(content))
+
+    # Select just the wages table by id instead of letting pandas parse
+    # every table on the page (FBref pages carry dozens of them)
+    root = lxml.html.fromstring(content)
+    wage_nodes = root.xpath('//table[contains(@id, "wages")]')
+    if wage_nodes:
+        tables = pd.read_html(lxml.html.tostring(wage_nodes[0], encoding="unicode"))
+    else:
+        # Fallback: parse the whole page and scan for a wages-like table
+        tables = pd.read_html(content.decode("utf-8", errors="replace"))
     wages_df, wage_col = find_wages_table(tables)
 
     # Normalise club column name
@@ -116,7 +180,7 @@ def fetch_fbref_wages_for_season(season: str, sleep_seconds: float = 1.0) -> pd.
     out.columns = ["club", "total_wage_bill_gbp_raw"]
 
     out["season"] = season
-    out["total_wage_bill_gbp"] = out["total_wage_bill_gbp_raw"].apply(parse_money_to_gbp)
+    out["total_wage_bill_gbp"] = parse_money_to_gbp(out["total_wage_bill_gbp_raw"])
 
     # Remove rows that are not clubs
     out = out.dropna(subset=["club"]).copy()
@@ -127,8 +191,6 @@ def fetch_fbref_wages_for_season(season: str, sleep_seconds: float = 1.0) -> pd.
 
     # Final shape
     out = out[["club", "season", "total_wage_bill_gbp"]].reset_index(drop=True)
-
-    time.sleep(sleep_seconds)
     return out
 
 
@@ -160,30 +222,54 @@ def main():
     parser.add_argument("--start", default="2013-2014", help="Start season in YYYY-YYYY")
     parser.add_argument("--end", default="2023-2024", help="End season in YYYY-YYYY")
     parser.add_argument("--outdir", default="data/raw/fbref_wages", help="Output directory")
-    parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to sleep between requests")
+    parser.add_argument("--sleep", type=float, default=1.0, help="Minimum seconds between requests")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel download threads")
     args = parser.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
+    cache_dir = os.path.join(args.outdir, ".cache")
 
     seasons = make_season_list(args.start, args.end)
 
     results = []
     failures = []
-
-    for s in seasons:
-        try:
-            df = fetch_fbref_wages_for_season(s, sleep_seconds=args.sleep)
-            outfile = os.path.join(args.outdir, f"wages_{s.replace('-', '_')}.csv")
-            df.to_csv(outfile, index=False)
-            results.append((s, len(df), outfile))
-            print(f"Saved {s} with {len(df)} rows -> {outfile}")
-        except Exception as e:
-            failures.append((s, str(e)))
-            print(f"FAILED {s}: {e}")
+    season_dfs = []
+
+    # Downloads are I/O-bound, so overlap them with a small thread pool.
+    # The global rate limiter keeps total request rate polite regardless
+    # of worker count.
+    with ThreadPoolExecutor(max_workers=args.workers) as ex:
+        futures = {
+            ex.submit(fetch_fbref_wages_for_season, s, args.sleep, cache_dir): s
+            for s in seasons
+        }
+        for fut in as_completed(futures):
+            s = futures[fut]
+            try:
+                df = fut.result()
+                season_dfs.append(df)
+                results.append((s, len(df)))
+                print(f"Fetched {s} with {len(df)} rows")
+            except Exception as e:
+                failures.append((s, str(e)))
+                print(f"FAILED {s}: {e}")
+
+    # Keep logs in season order regardless of completion order
+    results.sort()
+    failures.sort()
+
+    # Write all seasons once as a partitioned Parquet dataset instead of
+    # one CSV per season: fewer writes, smaller on disk, and much faster
+    # for downstream read_parquet
+    if season_dfs:
+        all_df = pd.concat(season_dfs, ignore_index=True)
+        wages_path = os.path.join(args.outdir, "wages.parquet")
+        all_df.to_parquet(wages_path, partition_cols=["season"], compression="zstd")
+        print(f"Saved {len(all_df)} rows -> {wages_path}")
 
     # Write a simple run log
     log_path = os.path.join(args.outdir, "run_log.csv")
-    pd.DataFrame(results, columns=["season", "rows", "file"]).to_csv(log_path, index=False)
+    pd.DataFrame(results, columns=["season", "rows"]).to_csv(log_path, index=False)
 
     fail_path = os.path.join(args.outdir, "failures.csv")
     pd.DataFrame(failures, columns=["season", "error"]).to_csv(fail_path, index=False)
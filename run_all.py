@@ -0,0 +1,37 @@
+"""
+Runs the full pipeline in one process: prepare -> clean -> regress.
+
+The dataframe stays in memory between stages, so nothing is serialised to
+disk unless --persist is passed (useful for auditing the intermediates).
+"""
+import argparse
+import importlib
+
+# The stage scripts keep their numbered filenames, so import them by name
+prepare = importlib.import_module("01_data_preparation").prepare
+clean = importlib.import_module("02_analysis").clean
+regress = importlib.import_module("03_regression").regress
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--persist",
+        action="store_true",
+        help="Also write the intermediate Parquet files for auditing",
+    )
+    args = parser.parse_args()
+
+    stacked = prepare()
+    if args.persist:
+        stacked.to_parquet("pl_financials_stacked.parquet", engine="pyarrow", compression="zstd")
+
+    df = clean(stacked)
+    if args.persist:
+        df.to_parquet("pl_financials_analysis_ready.parquet", engine="pyarrow", compression="zstd")
+
+    regress(df)
+
+
+if __name__ == "__main__":
+    main()